@@ -10,6 +10,9 @@ router.use(authMiddleware);
 // Valid notification statuses
 const VALID_STATUSES = ['pending', 'reviewed', 'dismissed'];
 
+// Maximum ids accepted by one bulk-check request
+const MAX_BULK_CHECK_IDS = 1000;
+
 // ============ PROCESSED EMAILS ============
 
 // POST /api/agent/processed-emails - Mark email as processed
@@ -47,6 +50,32 @@ router.post('/processed-emails', async (req: AuthRequest, res: Response) => {
   }
 });
 
+// POST /api/agent/processed-emails/bulk-check - Which of these emails are processed
+router.post('/processed-emails/bulk-check', async (req: AuthRequest, res: Response) => {
+  const { ids } = req.body;
+
+  if (!Array.isArray(ids) || !ids.every((id) => typeof id === 'string')) {
+    return res.status(400).json({ error: 'ids must be an array of strings' });
+  }
+  if (ids.length > MAX_BULK_CHECK_IDS) {
+    return res.status(400).json({ error: `At most ${MAX_BULK_CHECK_IDS} ids per request` });
+  }
+  if (ids.length === 0) {
+    return res.json({ processed: [] });
+  }
+
+  try {
+    const result = await pool.query(
+      'SELECT email_id FROM agent_processed_emails WHERE email_id = ANY($1)',
+      [ids]
+    );
+    res.json({ processed: result.rows.map((row) => row.email_id) });
+  } catch (error) {
+    console.error('Error checking processed emails:', error);
+    res.status(500).json({ error: 'Internal server error' });
+  }
+});
+
 // GET /api/agent/processed-emails - List all processed emails
 router.get('/processed-emails', async (req: AuthRequest, res: Response) => {
   try {
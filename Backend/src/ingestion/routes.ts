@@ -20,11 +20,15 @@ function tryParseJson(value: unknown): unknown {
   }
 }
 
+const MAX_FILE_SIZE = 10 * 1024 * 1024;
+
 const upload = multer({
   storage: multer.memoryStorage(),
-  limits: { fileSize: 10 * 1024 * 1024 },
+  limits: { fileSize: MAX_FILE_SIZE },
 });
 
+const GMAIL_API_URL = 'https://gmail.googleapis.com/gmail/v1/users/me';
+
 router.use(authMiddleware);
 
 /**
@@ -67,6 +71,63 @@ router.post(
   }
 );
 
+/**
+ * POST /api/ingestion/upload-from-gmail
+ * Fetches a Gmail attachment server-side, so the agent never downloads the file.
+ * Body: { messageId, attachmentId, fileName, mimeType?, accessToken }
+ */
+router.post(
+  '/upload-from-gmail',
+  requireAdmin,
+  async (req: AuthRequest, res: Response) => {
+    const { messageId, attachmentId, fileName, mimeType, accessToken } = req.body;
+    const type = req.query.type as 'cv' | 'job';
+    const dryRun = req.query.dryRun === 'true';
+
+    if (!messageId || !attachmentId || !fileName || !accessToken) {
+      res.status(400).json({ error: 'messageId, attachmentId, fileName and accessToken are required' });
+      return;
+    }
+
+    if (!type || (type !== 'cv' && type !== 'job')) {
+      res.status(400).json({ error: 'Query param "type" must be "cv" or "job"' });
+      return;
+    }
+
+    try {
+      const gmailRes = await fetch(
+        `${GMAIL_API_URL}/messages/${encodeURIComponent(messageId)}/attachments/${encodeURIComponent(attachmentId)}`,
+        { headers: { Authorization: `Bearer ${accessToken}` } }
+      );
+      if (!gmailRes.ok) {
+        res.status(502).json({ error: `Gmail attachment fetch failed with status ${gmailRes.status}` });
+        return;
+      }
+
+      const attachment = (await gmailRes.json()) as { data?: string };
+      const buffer = Buffer.from(attachment.data ?? '', 'base64url');
+      if (buffer.length > MAX_FILE_SIZE) {
+        res.status(413).json({ error: 'Attachment exceeds the 10MB upload limit' });
+        return;
+      }
+
+      const result = await processDocument({
+        buffer,
+        fileName,
+        mimeType,
+        type,
+        dryRun,
+      });
+
+      const status = result.success ? 200 : 422;
+      res.status(status).json(result);
+    } catch (error) {
+      console.error('Gmail ingestion error:', error);
+      res.status(500).json({ error: 'Internal server error' });
+    }
+  }
+);
+
 /**
  * GET /api/ingestion/logs
  */
@@ -82,6 +82,32 @@ describe('Agent API', () => {
       });
     });
 
+    describe('POST /api/agent/processed-emails/bulk-check', () => {
+      it('should return the ids that have been processed', async () => {
+        await request(app)
+          .post('/api/agent/processed-emails')
+          .set('Authorization', `Bearer ${authToken}`)
+          .send({ emailId: 'msg_1', emailType: 'candidate' });
+
+        const response = await request(app)
+          .post('/api/agent/processed-emails/bulk-check')
+          .set('Authorization', `Bearer ${authToken}`)
+          .send({ ids: ['msg_1', 'msg_2'] });
+
+        expect(response.status).toBe(200);
+        expect(response.body.processed).toEqual(['msg_1']);
+      });
+
+      it('should require an array of ids', async () => {
+        const response = await request(app)
+          .post('/api/agent/processed-emails/bulk-check')
+          .set('Authorization', `Bearer ${authToken}`)
+          .send({ ids: 'msg_1' });
+
+        expect(response.status).toBe(400);
+      });
+    });
+
     describe('GET /api/agent/processed-emails/:emailId', () => {
       it('should return processed email by id', async () => {
         // First create
@@ -113,6 +113,79 @@ describe('Ingestion Routes', () => {
     });
   });
 
+  describe('POST /api/ingestion/upload-from-gmail', () => {
+    const gmailBody = {
+      messageId: 'msg_123',
+      attachmentId: 'att_456',
+      fileName: 'cv.txt',
+      accessToken: 'ya29.test',
+    };
+
+    afterEach(() => {
+      vi.unstubAllGlobals();
+    });
+
+    it('should require admin role', async () => {
+      const res = await request(app)
+        .post('/api/ingestion/upload-from-gmail?type=cv')
+        .set('Authorization', `Bearer ${viewerToken}`)
+        .send(gmailBody);
+
+      expect(res.status).toBe(403);
+    });
+
+    it('should require Gmail handles', async () => {
+      const res = await request(app)
+        .post('/api/ingestion/upload-from-gmail?type=cv')
+        .set('Authorization', `Bearer ${adminToken}`)
+        .send({ messageId: 'msg_123' });
+
+      expect(res.status).toBe(400);
+      expect(res.body.error).toContain('attachmentId');
+    });
+
+    it('should return 502 when Gmail rejects the fetch', async () => {
+      vi.stubGlobal('fetch', vi.fn().mockResolvedValue(new Response('{}', { status: 401 })));
+
+      const res = await request(app)
+        .post('/api/ingestion/upload-from-gmail?type=cv')
+        .set('Authorization', `Bearer ${adminToken}`)
+        .send(gmailBody);
+
+      expect(res.status).toBe(502);
+    });
+
+    it('should fetch the attachment and process it', async () => {
+      const fetchMock = vi.fn().mockResolvedValue(
+        new Response(JSON.stringify({ data: Buffer.from('Test CV content').toString('base64url') }))
+      );
+      vi.stubGlobal('fetch', fetchMock);
+      vi.mocked(invokeNova).mockResolvedValue({
+        text: JSON.stringify({
+          name: 'Test User',
+          skills: [],
+          experience: [],
+          education: [],
+          certifications: [],
+          summary: 'A valid test summary for the user.',
+        }),
+        durationMs: 100,
+      });
+
+      const res = await request(app)
+        .post('/api/ingestion/upload-from-gmail?type=cv&dryRun=true')
+        .set('Authorization', `Bearer ${adminToken}`)
+        .send(gmailBody);
+
+      expect(res.status).toBe(200);
+      expect(res.body.success).toBe(true);
+      expect(fetchMock).toHaveBeenCalledWith(
+        expect.stringContaining('/messages/msg_123/attachments/att_456'),
+        { headers: { Authorization: 'Bearer ya29.test' } }
+      );
+    });
+  });
+
   describe('GET /api/ingestion/logs', () => {
     it('should require authentication', async () => {
       const res = await request(app).get('/api/ingestion/logs');
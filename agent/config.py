@@ -1,5 +1,28 @@
 """Configuration for HR Email Agent."""
+import logging
 import os
+from dataclasses import dataclass
+from pathlib import Path
+
+
+def _env_int(name: str, default: int, minimum: int = 1) -> int:
+    """Read an integer setting, falling back to default when unset or invalid."""
+    try:
+        value = int(os.getenv(name, str(default)))
+    except ValueError:
+        value = default
+    # A zero or negative interval would spin the loop
+    return max(minimum, value)
+
+
+def _env_log_level(name: str, default: str = "INFO") -> str:
+    """Read a logging level name, falling back to default when it isn't one."""
+    value = os.getenv(name, default).upper()
+    if value not in logging.getLevelNamesMapping():
+        logging.getLogger("hr_agent").warning("Unknown %s %r, using %s", name, value, default)
+        return default
+    return value
+
 
 # Hellio API configuration
 API_BASE_URL = os.getenv("HELLIO_API_URL", "http://localhost:3000")
@@ -9,7 +32,46 @@ API_PASSWORD = os.getenv("HELLIO_API_PASSWORD", os.getenv("ADMIN_PASSWORD", ""))
 # Gmail configuration
 GMAIL_CANDIDATES_ADDRESS = os.getenv("GMAIL_CANDIDATES", "nyo1254+candidates@gmail.com")
 GMAIL_POSITIONS_ADDRESS = os.getenv("GMAIL_POSITIONS", "nyo1254+positions@gmail.com")
+# One query covering both HR addresses, so each cycle costs a single messages.list
+UNREAD_QUERY = f"is:unread (to:{GMAIL_CANDIDATES_ADDRESS} OR to:{GMAIL_POSITIONS_ADDRESS})"
+
+# Gmail push notifications (users.watch + Pub/Sub). Leave unset to poll instead.
+# Set the topic plus either a pull subscription or a port for a push subscription's endpoint.
+GMAIL_PUBSUB_TOPIC = os.getenv("GMAIL_PUBSUB_TOPIC", "")  # projects/<project>/topics/<topic>
+GMAIL_PUBSUB_SUBSCRIPTION = os.getenv("GMAIL_PUBSUB_SUBSCRIPTION", "")  # projects/<project>/subscriptions/<sub>
+GMAIL_PUSH_PORT = _env_int("GMAIL_PUSH_PORT", 0, minimum=0)
+# Required with GMAIL_PUSH_PORT: push deliveries must carry ?token=<value> in the endpoint URL
+GMAIL_PUSH_TOKEN = os.getenv("GMAIL_PUSH_TOKEN", "")
 
 # Agent configuration
-POLL_INTERVAL = int(os.getenv("POLL_INTERVAL", "30"))
-MAX_EMAILS_PER_CYCLE = int(os.getenv("MAX_EMAILS_PER_CYCLE", "10"))
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Agent tuning knobs, parsed once at startup."""
+    log_level: str
+    poll_interval: int
+    max_emails_per_cycle: int
+    # Background workers draining the email queue (each runs its own agent)
+    email_workers: int
+    # Idle backoff: the poll interval doubles after each empty cycle, up to this cap
+    max_poll_interval: int
+    # With push enabled, still poll this often to catch dropped notifications
+    safety_poll_interval: int
+    # Cycles normally read Gmail history deltas; a full unread search runs this often
+    # to pick up emails left unread for retry
+    full_sync_interval: int
+
+
+SETTINGS = Settings(
+    log_level=_env_log_level("LOG_LEVEL"),
+    poll_interval=_env_int("POLL_INTERVAL", 30),
+    max_emails_per_cycle=_env_int("MAX_EMAILS_PER_CYCLE", 10),
+    email_workers=_env_int("EMAIL_WORKERS", 4),
+    max_poll_interval=_env_int("MAX_POLL_INTERVAL", 900),
+    safety_poll_interval=_env_int("SAFETY_POLL_INTERVAL", 3600),
+    full_sync_interval=_env_int("FULL_SYNC_INTERVAL", 3600),
+)
+
+# Persistent agent state (last synced Gmail historyId)
+STATE_DB_PATH = os.getenv("AGENT_STATE_DB", str(Path.home() / ".hellio-agent" / "state.db"))
@@ -1,304 +1,32 @@
 """HR Email Agent using Strands framework."""
+import functools
+import threading
+from pathlib import Path
+
 from strands import Agent
 from strands.models import BedrockModel
 
-from config import GMAIL_CANDIDATES_ADDRESS, GMAIL_POSITIONS_ADDRESS
-
-# System prompt with HR workflow rules
-SYSTEM_PROMPT = """You are an HR assistant for Hellio. Your job is to process incoming emails and help with HR workflows.
-
-## CRITICAL RULES
-1. NEVER send emails automatically - only create drafts
-2. ALWAYS create a notification for human review after processing
-3. ONLY mark emails as processed AFTER successful ingestion (ingest_cv or ingest_job returns a valid ID)
-4. If ingestion fails, DO NOT mark email as processed - it will be retried next cycle
-5. ALWAYS call mark_email_as_read after SUCCESSFULLY processing an email. If processing fails, do NOT mark as read - it will be retried next cycle
-6. Be thorough but concise in your summaries
-7. If processing FAILS at any step, call create_notification(type="error", summary="Failed to process email from [sender]: [error details]") before stopping. This ensures errors are tracked in the database.
-8. For emails that don't match candidates or positions address ("other" emails): call mark_email_processed(email_id, email_type="other", action_taken="skipped", summary="Not an HR email: [brief reason]") and mark_email_as_read()
-9. When calling create_draft, ALWAYS pass reply_to_message_id=<the original email message_id> so the draft appears in the same Gmail conversation thread
-
-## MANDATORY WORKFLOW FOR CV PROCESSING
-For EVERY candidate email with attachment, you MUST follow this EXACT sequence:
-1. read_email → get attachment info (attachmentId, filename)
-2. download_and_ingest_cv(message_id, attachment_id, filename) → get candidateId and candidateName (MUST succeed before continuing)
-   NOTE: This downloads AND ingests in one step. Do NOT call download_attachment + ingest_cv separately.
-3. ONLY if download_and_ingest_cv returned a candidateId:
-   - suggest_positions_for_candidate(candidateId) → get matching positions with similarity scores
-   - Pick the right template based on match results:
-     * If the list is EMPTY (no positions exist in the system yet) → Template B5 (Potential Match) - use a neutral "we're reviewing" tone since we can't assess match quality yet
-     * If ANY position has similarity >= 0.8 → Template B4 (Strong Match) - mention the matched position(s)
-     * If ANY position has similarity >= 0.6 → Template B5 (Potential Match) - mention the area of match
-     * If positions exist but all < 0.6 AND there are alternative positions → Template B6 (Weak + Alternatives)
-     * If positions exist but all < 0.6 AND no alternatives → Template B7 (Weak No Alternatives)
-   - create_draft with the selected template response. ALWAYS pass reply_to_message_id=<the email message_id> so the draft appears in the same Gmail thread.
-   - create_notification with ALL of these parameters:
-     * type="new_candidate"
-     * summary="New candidate: [NAME]. Action: Review draft email in Gmail and send."
-     * action_url="/candidates/[candidateId]"
-     * candidate_id=[candidateId]
-   - mark_email_processed with email_type="candidate", candidate_id=<the ID>
-   - mark_email_as_read to remove it from future unread searches
-4. If NO CV attached:
-   - create_draft requesting CV
-   - create_notification with summary="Missing CV from [sender name/email]. Action: Review draft requesting CV in Gmail."
-   - mark_email_as_read
-5. If ANY step fails:
-   - Call create_notification(type="error", summary="Failed to process candidate email from [sender]: [error details]")
-   - DO NOT call mark_email_processed and DO NOT call mark_email_as_read - leave it unread for retry
-
-## MANDATORY WORKFLOW FOR JOB POSTING PROCESSING
-For EVERY job posting email, you MUST follow this EXACT sequence:
-1. read_email → get email body with job details
-2. save_email_as_text(email_body, "job_posting.txt") → get file_path
-3. ingest_job(file_path, "job_posting.txt") → get positionId and title (MUST succeed before continuing)
-4. ONLY if ingest_job returned a positionId:
-   - suggest_candidates_for_position(positionId) → get matching candidates
-   - create_draft with confirmation email. ALWAYS pass reply_to_message_id=<the email message_id> so the draft appears in the same Gmail thread.
-   - create_notification with ALL of these parameters:
-     * type="new_position"
-     * summary="New position: [TITLE]. [X] candidates matched. Action: Review draft in Gmail and send."
-     * action_url="/positions/[positionId]"
-     * position_id=[positionId]
-   - mark_email_processed with email_type="position", position_id=<the ID>
-   - mark_email_as_read to remove it from future unread searches
-5. If ANY step fails:
-   - Call create_notification(type="error", summary="Failed to process job posting from [sender]: [error details]")
-   - DO NOT call mark_email_processed and DO NOT call mark_email_as_read - leave it unread for retry
-
-## Email Classification
-- Emails TO {candidates_addr} → Candidate application
-- Emails TO {positions_addr} → Job posting from hiring manager
-- Other emails → Call mark_email_processed(email_id, email_type="other", action_taken="skipped", summary="...") + mark_email_as_read()
-
-## Workflow 1: Job Posting from Hiring Manager
-
-When you receive an email to the positions address:
-
-1. **Validate minimum required fields** - The email MUST have at least:
-   - Job Title (or clear role description)
-   - Some skills or requirements
-   If these are present, ALWAYS ingest the job - do not reject it for missing optional fields.
-   Fields like salary range, department, location, education requirements are OPTIONAL.
-
-2. **ALWAYS ingest the job if it has a title and requirements**:
-   - Use save_email_as_text + ingest_job to process
-   - Use suggest_candidates_for_position to find matching candidates
-   - Create draft confirmation email (Template A3) mentioning:
-     * Position is now active
-     * X matching candidates found (list top 3 names if any)
-     * Next steps: "I will begin active sourcing"
-     * If any useful fields are missing (salary, location, etc.), mention them politely in the draft
-   - Create notification summarizing what was done
-
-3. **ONLY reject if the email has no job details at all** (e.g., just "we need someone"):
-   - Create draft email (Template A1) requesting details
-   - Create notification explaining what's missing
-
-## Workflow 2: Candidate Application
-
-When you receive an email to the candidates address:
-
-1. **Check for CV attachment** (use read_email to see attachments):
-   - If NO CV attached → Draft request email (Template B1), mark as processed, create notification
-   - If CV attached → Continue to step 2
-
-2. **Download and ingest the CV in one step** (REQUIRED):
-   - Call download_and_ingest_cv(message_id, attachment_id, filename)
-   - This downloads the file AND ingests it atomically
-   - Check response for candidateId
-   - If it fails or returns error, STOP - do not mark as processed
-   - Note the candidateId for later
-   - Do NOT call download_attachment or ingest_cv separately
-
-3. **Only after successful ingestion**, continue with:
-   - Call suggest_positions_for_candidate(candidateId) to find matching positions
-   - Pick the right template based on best match similarity score:
-     * Empty list (no positions in system) → Template B5 (neutral "under review" tone)
-     * similarity >= 0.8 → Template B4 (Strong Match)
-     * similarity >= 0.6 → Template B5 (Potential Match)
-     * similarity < 0.6 with alternatives → Template B6 (Weak + Alternatives)
-     * similarity < 0.6 without alternatives → Template B7 (Weak No Alternatives)
-   - Draft response using the selected template, including matched position names
-   - Create notification with candidateId
-   - Call mark_email_processed with email_type="candidate", candidateId=<the ID from step 2>
-   - Call mark_email_as_read to remove it from future unread searches
-
-4. **If ANY step fails**:
-   - Call create_notification(type="error", summary="Failed to process candidate email from [sender]: [error details]")
-   - Do NOT call mark_email_processed and do NOT call mark_email_as_read - leave it unread for retry
-
-## Email Templates
-
-### Template A1: Request Missing Job Info
-Subject: Additional Information Needed - [Job Title] Position
-
-Dear [Hiring Manager],
-
-Thank you for submitting the [Job Title] position. To ensure we attract the best candidates, I need a few additional details:
-
-[LIST SPECIFIC MISSING ITEMS]
-
-Could you provide this by [DATE]? This will allow me to begin sourcing immediately.
-
-Best regards,
-Hellio HR
-
-### Template A3: Position Active + Candidates Found
-Subject: [Job Title] Position Active - [X] Potential Candidates Identified
-
-Dear [Hiring Manager],
-
-The [Job Title] position is now active in our system.
-
-**Matching Candidates from Current Pool:**
-[LIST TOP 3 CANDIDATES OR "No immediate matches found"]
-
-**Next Steps:**
-- I will begin active sourcing
-- Weekly updates on new candidates
-- Strong matches shared immediately
-
-Best regards,
-Hellio HR
-
-### Template B1: Request Missing CV
-Subject: CV Needed - [Position] Application
-
-Dear [Candidate Name],
-
-Thank you for your interest in the [Position] role!
-
-I noticed your CV wasn't attached. Could you please reply with your CV as a PDF or Word document?
-
-Looking forward to reviewing your background!
-
-Best regards,
-Hellio HR
-
-### Template B4: Strong Match Response
-Subject: Your Application for [Position] - Next Steps
-
-Dear [Candidate Name],
-
-Thank you for applying for the [Position] role! I've reviewed your CV and I'm impressed by your [SPECIFIC STRENGTH].
-
-Your background aligns well with what we're looking for. Here's what happens next:
-
-1. Initial Review (current) - Sharing with hiring manager
-2. Phone Screen (if selected) - 30-minute conversation
-3. Technical Interview - Deeper skills assessment
-4. Final Interview - Team fit discussion
-
-Expect to hear from us within 3-5 business days.
-
-Best regards,
-Hellio HR
-
-### Template B5: Potential Match Response
-Subject: Your Application for [Position] - Under Review
-
-Dear [Candidate Name],
-
-Thank you for applying for the [Position] role! Your background in [AREA] shows promise.
+# Shared Bedrock model; boto3 clients are thread-safe, Agent conversations are not
+_model_cache = {"model": None}
+_model_lock = threading.Lock()
 
-We're reviewing all applications and will be in touch within 5-7 business days.
+# System prompt with HR workflow rules, kept in a versioned .txt file for easy editing
+# (email templates are served by get_template)
+SYSTEM_PROMPT = (Path(__file__).parent / "prompts" / "system.v1.txt").read_text(encoding="utf-8")
 
-Best regards,
-Hellio HR
 
-### Template B6: Weak Match with Alternatives
-Subject: Alternative Opportunities - [Original Position]
-
-Dear [Candidate Name],
-
-Thank you for applying for the [Position] role! After reviewing your CV, I noticed your strong background in [THEIR STRENGTH].
-
-For this specific role, we're looking for [MISSING REQUIREMENT]. However, these positions might be a better fit:
-
-[LIST ALTERNATIVE POSITIONS]
-
-Would you like to be considered for any of these?
-
-Best regards,
-Hellio HR
-
-### Template B7: Weak Match No Alternatives
-Subject: Thank You for Your Application - [Position]
-
-Dear [Candidate Name],
-
-Thank you for your interest in the [Position] role at Hellio.
-
-After reviewing your background, we've decided to move forward with candidates whose experience more closely aligns with [KEY REQUIREMENT].
-
-We'll keep your CV on file for future opportunities.
-
-Best regards,
-Hellio HR
-
-### Template B8: Notify Hiring Manager of Strong Candidate
-Subject: Strong Candidate for [Position] - [Candidate Name]
-
-Dear [Hiring Manager],
-
-I wanted to share an exciting candidate for the [Position]:
-
-**Candidate**: [Name]
-**Background**: [Current role, years experience, key skills]
-**Why Strong Match**: [2-3 specific alignments]
-**Profile**: [Link to Hellio system]
-
-Recommend scheduling a phone screen within the week.
-
-Best regards,
-Hellio HR
-
-## Tools Available
-
-Use these tools to interact with the Hellio system:
-- download_and_ingest_cv: Download CV attachment from Gmail and ingest in one step (ALWAYS use this for CVs)
-- ingest_cv: Process a CV file already on disk (only if file was saved manually)
-- ingest_job: Process a job posting file and create position
-- create_notification: Alert human for review
-- mark_email_processed: Track that email was handled
-- check_email_processed: See if email was already handled
-- get_positions: List all open positions
-- get_candidates: List all candidates
-- suggest_candidates_for_position: Find matching candidates for a position
-- suggest_positions_for_candidate: Find matching positions for a candidate (use after CV ingestion)
-- get_candidate_details: Get full candidate info
-- get_position_details: Get full position info
-
-For Gmail operations, use the Gmail MCP tools:
-- search_emails: Find unread emails
-- read_email: Get email content
-- draft_email: Create draft (NEVER send!)
-- download_attachment: Get CV/job files
-- modify_email: Add labels to mark as read
-
-## Response Guidelines
-- Be professional but warm
-- Personalize responses with specific details from email/CV
-- Never use placeholder text like [INSERT NAME] in actual drafts
-- Set realistic timelines (3-5 business days for initial response)
-- Always explain next steps clearly
-""".format(
-    candidates_addr=GMAIL_CANDIDATES_ADDRESS,
-    positions_addr=GMAIL_POSITIONS_ADDRESS
-)
-
-
-def create_agent() -> Agent:
-    """Create and configure the HR Email Agent."""
+@functools.cache
+def _load_tools() -> tuple:
+    """Import and collect the agent's tools once per process."""
     from tools.hellio_api import (
         ingest_cv,
         ingest_job,
         download_and_ingest_cv,
-        save_email_as_text,
+        ingest_job_text,
         create_notification,
         mark_email_processed,
         check_email_processed,
+        check_emails_processed,
         get_positions,
         get_candidates,
         suggest_candidates_for_position,
@@ -308,43 +36,70 @@ def create_agent() -> Agent:
     )
     from tools.gmail_api import (
         search_emails,
+        list_unprocessed_emails,
         read_email,
         download_attachment,
         create_draft,
-        mark_email_as_read,
+        mark_emails_as_read,
     )
+    from tools.templates import get_template
 
-    # Use Bedrock with Nova Lite (used by backend for extractions)
-    model = BedrockModel(
-        model_id="amazon.nova-lite-v1:0",
-        region_name="us-east-1"
+    return (
+        # Gmail tools
+        search_emails,
+        list_unprocessed_emails,
+        read_email,
+        download_attachment,
+        create_draft,
+        mark_emails_as_read,
+        # Template tools
+        get_template,
+        # Hellio API tools
+        download_and_ingest_cv,
+        ingest_cv,
+        ingest_job,
+        ingest_job_text,
+        create_notification,
+        mark_email_processed,
+        check_email_processed,
+        check_emails_processed,
+        get_positions,
+        get_candidates,
+        suggest_candidates_for_position,
+        suggest_positions_for_candidate,
+        get_candidate_details,
+        get_position_details,
     )
 
-    agent = Agent(
-        model=model,
-        system_prompt=SYSTEM_PROMPT,
-        tools=[
-            # Gmail tools
-            search_emails,
-            read_email,
-            download_attachment,
-            create_draft,
-            mark_email_as_read,
-            # Hellio API tools
-            download_and_ingest_cv,
-            ingest_cv,
-            ingest_job,
-            save_email_as_text,
-            create_notification,
-            mark_email_processed,
-            check_email_processed,
-            get_positions,
-            get_candidates,
-            suggest_candidates_for_position,
-            suggest_positions_for_candidate,
-            get_candidate_details,
-            get_position_details,
-        ]
+
+def _get_model() -> BedrockModel:
+    """Return the shared Bedrock model, building it on first use."""
+    with _model_lock:
+        if _model_cache["model"] is None:
+            # Use Bedrock with Nova Lite (used by backend for extractions).
+            _model_cache["model"] = BedrockModel(
+                model_id="amazon.nova-lite-v1:0",
+                region_name="us-east-1",
+            )
+        return _model_cache["model"]
+
+
+def create_agent() -> Agent:
+    """Create an HR Email Agent with its own conversation.
+
+    Each worker needs a separate Agent, since a Strands agent holds one
+    conversation; the Bedrock model and tool list are shared between them.
+    """
+    return Agent(
+        model=_get_model(),
+        # The system prompt is identical on every call, so put a cache point after
+        # it and let Bedrock reuse the prefix. Nova only accepts cache points in
+        # system and messages, not toolConfig, so tools are not cached.
+        system_prompt=[{"text": SYSTEM_PROMPT}, {"cachePoint": {"type": "default"}}],
+        tools=list(_load_tools()),
     )
 
-    return agent
+
+def reset_agent(agent: Agent):
+    """Forget the agent's conversation so it can take the next email from scratch."""
+    agent.messages.clear()
@@ -0,0 +1,24 @@
+"""Cheap header checks that skip automated mail before it reaches the agent."""
+import re
+
+# Substrings that mark bounces, auto-replies and bulk mail
+SENDER_PATTERNS = ["mailer-daemon", "postmaster@"]
+SUBJECT_PATTERNS = [
+    "out of office",
+    "automatic reply",
+    "auto-reply",
+    "autoreply",
+    "undeliverable",
+    "delivery status notification",
+    "unsubscribe",
+]
+
+# One alternation per header, compiled once; a single scan per email
+_SENDER_RE = re.compile("|".join(map(re.escape, SENDER_PATTERNS)), re.IGNORECASE)
+_SUBJECT_RE = re.compile("|".join(map(re.escape, SUBJECT_PATTERNS)), re.IGNORECASE)
+
+
+def automated_reason(email: dict):
+    """Return the matched pattern if the email looks automated, else None."""
+    match = _SENDER_RE.search(email.get("from", "")) or _SUBJECT_RE.search(email.get("subject", ""))
+    return match.group(0).lower() if match else None
@@ -0,0 +1,114 @@
+"""Gmail push notifications via users.watch + Pub/Sub.
+
+Notifications reach the agent either through a pull subscription
+(GMAIL_PUBSUB_SUBSCRIPTION) or as Pub/Sub push POSTs to a small HTTP
+endpoint (GMAIL_PUSH_PORT).
+"""
+import hmac
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from config import GMAIL_PUBSUB_TOPIC, GMAIL_PUBSUB_SUBSCRIPTION, GMAIL_PUSH_PORT, GMAIL_PUSH_TOKEN
+from tools.gmail_api import get_gmail_service
+
+# Gmail expires a watch after 7 days; Google recommends re-arming daily
+WATCH_RENEW_INTERVAL = 24 * 60 * 60
+
+# Seconds a push connection may sit idle before it is dropped
+PUSH_REQUEST_TIMEOUT = 10
+
+logger = logging.getLogger("hr_agent.push")
+
+
+class _PushHandler(BaseHTTPRequestHandler):
+    """Accepts Pub/Sub push deliveries and wakes the agent loop."""
+
+    # Socket timeout, so an idle client or a false Content-Length can't hold a thread forever
+    timeout = PUSH_REQUEST_TIMEOUT
+
+    def do_POST(self):
+        try:
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        except ValueError:
+            self.send_response(400)
+            self.end_headers()
+            return
+        token = parse_qs(urlparse(self.path).query).get("token", [""])[0]
+        # Compare bytes: compare_digest rejects non-ASCII str with a TypeError
+        if not hmac.compare_digest(token.encode(), GMAIL_PUSH_TOKEN.encode()):
+            self.send_response(403)
+            self.end_headers()
+            return
+        self.server.wake.set()
+        # Any 2xx acknowledges the message to Pub/Sub
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        logger.debug("push endpoint: " + format, *args)
+
+
+class GmailPushListener:
+    """Wakes the agent loop when Gmail reports new mail.
+
+    Notifications only set the wake event; the woken cycle reads the Gmail
+    history delta itself, so a dropped or duplicated notification costs nothing.
+    """
+
+    def __init__(self, wake: threading.Event):
+        self._wake = wake
+        self._watch_armed_at = 0.0
+        self._subscriber = None
+        self._future = None
+        self._server = None
+
+    def start(self):
+        """Arm the Gmail watch and start receiving notifications."""
+        # The endpoint listens on all interfaces, so it must not accept unauthenticated posts
+        if not GMAIL_PUBSUB_SUBSCRIPTION and not GMAIL_PUSH_TOKEN:
+            raise RuntimeError("GMAIL_PUSH_TOKEN must be set to serve the Pub/Sub push endpoint")
+        self.renew_watch()
+
+        if GMAIL_PUBSUB_SUBSCRIPTION:
+            from google.cloud import pubsub_v1
+
+            self._subscriber = pubsub_v1.SubscriberClient()
+            self._future = self._subscriber.subscribe(GMAIL_PUBSUB_SUBSCRIPTION, self._on_message)
+        else:
+            # One thread per connection, so a slow client can't hold up real deliveries
+            self._server = ThreadingHTTPServer(("", GMAIL_PUSH_PORT), _PushHandler)
+            self._server.daemon_threads = True
+            self._server.wake = self._wake
+            threading.Thread(target=self._server.serve_forever, name="gmail-push", daemon=True).start()
+            logger.info("Listening for Pub/Sub push on port %d", GMAIL_PUSH_PORT)
+
+    def stop(self):
+        """Stop receiving notifications."""
+        if self._future:
+            self._future.cancel()
+        if self._subscriber:
+            self._subscriber.close()
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def renew_watch(self):
+        """Call users.watch on the unread inbox."""
+        response = get_gmail_service().users().watch(
+            userId="me",
+            body={"topicName": GMAIL_PUBSUB_TOPIC, "labelIds": ["UNREAD", "INBOX"]},
+        ).execute()
+        self._watch_armed_at = time.monotonic()
+        logger.info("Gmail watch armed (historyId=%s)", response["historyId"])
+
+    def renew_if_due(self):
+        """Re-arm the watch before Gmail expires it."""
+        if time.monotonic() - self._watch_armed_at >= WATCH_RENEW_INTERVAL:
+            self.renew_watch()
+
+    def _on_message(self, message):
+        message.ack()
+        self._wake.set()
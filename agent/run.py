@@ -1,122 +1,237 @@
 #!/usr/bin/env python3
 """HR Email Agent runner with polling loop."""
-import time
+import logging
 import signal
 import sys
-import requests
-from datetime import datetime
-
-from config import POLL_INTERVAL, GMAIL_CANDIDATES_ADDRESS, GMAIL_POSITIONS_ADDRESS, API_BASE_URL
-from hr_agent import create_agent
-
-# Recreate agent every N cycles to prevent context accumulation
-RESET_INTERVAL = 50
-
-# Flag for graceful shutdown
-running = True
+import threading
+import time
+from email.utils import getaddresses
+
+from config import (
+    SETTINGS,
+    GMAIL_CANDIDATES_ADDRESS,
+    GMAIL_POSITIONS_ADDRESS,
+    GMAIL_PUBSUB_TOPIC,
+    GMAIL_PUBSUB_SUBSCRIPTION,
+    GMAIL_PUSH_PORT,
+)
+from prefilter import automated_reason
+from tasks import enqueue, flush_read_marks, queue_read_mark, report_error, start_workers, stop_workers
+from state import get_state, set_state
+from tools.gmail_api import get_email_summaries, get_history_id, list_new_message_ids, search_unread_page
+from tools.hellio_api import check_email_processed, mark_email_processed, preload_processed
+
+logger = logging.getLogger("hr_agent")
+
+# Push mode: Gmail wakes us on new mail, polling only as a safety net
+PUSH_ENABLED = bool(GMAIL_PUBSUB_TOPIC and (GMAIL_PUBSUB_SUBSCRIPTION or GMAIL_PUSH_PORT))
+BASE_INTERVAL = SETTINGS.safety_poll_interval if PUSH_ENABLED else SETTINGS.poll_interval
+
+BANNER = "\n".join([
+    "=" * 60,
+    "HR Email Agent Starting",
+    "=" * 60,
+    f"Candidates address: {GMAIL_CANDIDATES_ADDRESS}",
+    f"Positions address: {GMAIL_POSITIONS_ADDRESS}",
+    f"Push notifications: {GMAIL_PUBSUB_SUBSCRIPTION or f'HTTP endpoint on port {GMAIL_PUSH_PORT}'}"
+    if PUSH_ENABLED else "Push notifications: disabled",
+    f"{'Safety poll' if PUSH_ENABLED else 'Poll'} interval: {BASE_INTERVAL} seconds",
+    f"Email workers: {SETTINGS.email_workers}",
+    "=" * 60,
+])
+
+# Set once to request a graceful shutdown
+shutdown = threading.Event()
+
+# Set by the signal handler or a Gmail push notification to end the current wait
+wake = threading.Event()
 
 
 def signal_handler(signum, frame):
     """Handle shutdown signals gracefully."""
-    global running
-    print("\nShutdown requested, finishing current cycle...")
-    running = False
+    logger.info("Shutdown requested, finishing current cycle...")
+    shutdown.set()
+    wake.set()
+
+
+def classify(email: dict):
+    """Return "candidate", "position" or None based on the email's TO addresses."""
+    recipients = {addr.lower() for _, addr in getaddresses([email.get("to", "")])}
+    if GMAIL_CANDIDATES_ADDRESS.lower() in recipients:
+        return "candidate"
+    if GMAIL_POSITIONS_ADDRESS.lower() in recipients:
+        return "position"
+    return None
+
+
+def sync_inbox(full: bool, page_token: str = None, full_history_id: str = None) -> tuple:
+    """Return (emails, history_id, next_page_token) for mail to consider this cycle.
+
+    Incremental cycles list only messages added since the stored historyId,
+    keeping those addressed to an HR mailbox, and never have a next page. A full
+    sync runs the unread search instead, which also picks up emails left unread
+    for retry. It reads one page per cycle; pass the previous page's token and
+    history_id back in to continue it.
+    """
+    history_id = get_state("gmail_history_id")
+    if history_id and not full:
+        message_ids, new_history_id = list_new_message_ids(history_id)
+        if new_history_id:
+            emails = get_email_summaries(message_ids) if message_ids else []
+            return [email for email in emails if classify(email)], new_history_id, None
+        logger.info("Gmail history %s expired, running a full sync", history_id)
+        page_token = None
+
+    # Read the historyId before the first page so mail arriving during the search is in the next delta
+    if page_token is None:
+        full_history_id = get_history_id()
+    emails, next_page_token = search_unread_page(SETTINGS.max_emails_per_cycle, page_token)
+    return emails, full_history_id, next_page_token
+
+
+def find_new_emails(emails: list) -> list:
+    """Drop emails already processed, looking them all up in one API call.
+
+    Processed emails found here are still unread (e.g. the process stopped
+    before their read mark was flushed), so they are queued to be marked read.
+    """
+    preload_processed([email["id"] for email in emails])
+    new_emails = []
+    for email in emails:
+        if check_email_processed(email_id=email["id"])["found"]:
+            queue_read_mark(email["id"])
+        else:
+            new_emails.append(email)
+    return new_emails
+
+
+def skip(email: dict, summary: str):
+    """Record an email as handled without running the agent, and mark it read."""
+    mark_email_processed(
+        email_id=email["id"],
+        email_type="other",
+        action_taken="skipped",
+        summary=summary,
+    )
+    queue_read_mark(email["id"])
+
+
+def route(email: dict) -> bool:
+    """Queue an HR email for its worker, or skip it without the LLM.
+
+    Returns True if the email was queued.
+    """
+    reason = automated_reason(email)
+    if reason:
+        skip(email, f"Automated email ({reason}) from {email.get('from') or 'unknown sender'}")
+        return False
+
+    kind = classify(email)
+    if kind:
+        return enqueue(email["id"], kind)
+
+    skip(email, f"Not an HR email: sent to {email.get('to') or 'unknown recipient'}")
+    return False
 
 
 def main():
     """Main polling loop."""
-    global running
-
     # Register signal handlers for graceful shutdown
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
 
-    print("=" * 60)
-    print("HR Email Agent Starting")
-    print("=" * 60)
-    print(f"Candidates address: {GMAIL_CANDIDATES_ADDRESS}")
-    print(f"Positions address: {GMAIL_POSITIONS_ADDRESS}")
-    print(f"Poll interval: {POLL_INTERVAL} seconds")
-    print("=" * 60)
-
-    # Create the agent
-    print("Initializing agent...")
-    agent = create_agent()
-    print("Agent ready!")
-    print()
-
-    cycle = 0
-    while running:
-        cycle += 1
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        print(f"[{timestamp}] Polling cycle {cycle}")
-
-        # Reset agent periodically to prevent context drift
-        if cycle % RESET_INTERVAL == 0:
-            print(f"   Resetting agent (every {RESET_INTERVAL} cycles)...")
-            agent = create_agent()
-
-        try:
-            # Instruct the agent to find and process ONE email per cycle
-            prompt = f"""
-Check for new unread emails that need processing.
+    logging.basicConfig(format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    logging.getLogger("hr_agent").setLevel(SETTINGS.log_level)
 
-1. Search for unread emails sent to either:
-   - {GMAIL_CANDIDATES_ADDRESS} (candidate applications)
-   - {GMAIL_POSITIONS_ADDRESS} (job postings)
+    logger.info(BANNER)
 
-2. Find the FIRST unprocessed email:
-   - Check each email with check_email_processed
-   - Pick the first one that has NOT been processed yet
+    listener = None
+    if PUSH_ENABLED:
+        from push import GmailPushListener
+        listener = GmailPushListener(wake)
+        listener.start()
+    interval = BASE_INTERVAL
 
-3. If you found an unprocessed email:
-   - Process it according to the appropriate workflow
-   - Mark it as processed when done
-   - Then STOP - do not process any more emails this cycle
+    start_workers(wake)
 
-4. If all emails are already processed (or no emails found):
-   - Say "No new emails to process" and STOP
+    # Backs off while the inbox stays empty, resets as soon as mail shows up
+    current_interval = interval
+    max_interval = max(interval, SETTINGS.max_poll_interval)
+    last_full_sync = None
+    # While a full sync is paging through the unread search: (next page token, its historyId)
+    full_sync_page = None
 
-IMPORTANT: Only process ONE email per cycle. After handling one email, stop immediately.
-"""
-            result = agent(prompt)
-            result_text = str(result).lower()
-            print(f"   Result: {result}")
+    cycle = 0
+    while not shutdown.is_set():
+        cycle += 1
+        logger.info("Polling cycle %d", cycle)
 
-            # If agent processed an email, immediately start next cycle
-            has_work = "no new emails" not in result_text
+        try:
+            if listener:
+                listener.renew_if_due()
+            full = (
+                full_sync_page is not None
+                or last_full_sync is None
+                or time.monotonic() - last_full_sync >= SETTINGS.full_sync_interval
+            )
+            page_token, full_history_id = full_sync_page or (None, None)
+            emails, history_id, next_page_token = sync_inbox(full, page_token, full_history_id)
+
+            new_emails = find_new_emails(emails)
+            queued = sum(route(email) for email in new_emails)
+            if queued:
+                logger.info("Queued %d email(s) for processing", queued)
+            else:
+                logger.info("No new emails to process")
+
+            marked = flush_read_marks()
+            if marked:
+                logger.info("Marked %d processed email(s) as read", marked)
+
+            # Only advance the sync point once every email in it has been routed
+            set_state("gmail_history_id", history_id)
+            # A full sync only counts as done once it has read the last page of unread mail
+            if next_page_token:
+                full_sync_page = (next_page_token, history_id)
+            else:
+                full_sync_page = None
+                if full:
+                    last_full_sync = time.monotonic()
+
+            # More unread pages are waiting; history deltas are exhaustive
+            has_work = next_page_token is not None
+
+            if new_emails:
+                current_interval = interval
+            else:
+                current_interval = min(current_interval * 2, max_interval)
 
         except Exception as e:
-            print(f"   Error in polling cycle: {e}")
+            logger.error("Error in polling cycle: %s", e)
             has_work = False
-            # Persist error to DB so it's visible in the dashboard
-            try:
-                from tools.hellio_api import get_auth_token
-                token = get_auth_token()
-                requests.post(
-                    f"{API_BASE_URL}/api/agent/notifications",
-                    json={
-                        "type": "error",
-                        "summary": f"Agent polling cycle {cycle} failed: {str(e)[:500]}",
-                    },
-                    headers={"Authorization": f"Bearer {token}"},
-                    timeout=5,
-                )
-            except Exception as notify_err:
-                print(f"   Failed to persist error notification: {notify_err}")
-
-        if running and not has_work:
-            print(f"   Sleeping for {POLL_INTERVAL} seconds...")
-            # Sleep in small increments to allow graceful shutdown
-            for _ in range(POLL_INTERVAL):
-                if not running:
-                    break
-                time.sleep(1)
-        elif running and has_work:
-            print("   More emails may be waiting, starting next cycle immediately...")
-
-    print()
-    print("HR Email Agent stopped.")
+            # Start any interrupted full sync over rather than reuse a page token that may be bad
+            full_sync_page = None
+            report_error(f"Agent polling cycle {cycle} failed: {e}")
+
+        if shutdown.is_set():
+            break
+        if not has_work:
+            logger.info("Waiting up to %d seconds for new mail...", current_interval)
+            wake.wait(current_interval)
+            wake.clear()
+        else:
+            logger.info("More emails may be waiting, starting next cycle immediately...")
+
+    if listener:
+        listener.stop()
+    logger.info("Waiting for in-progress emails to finish...")
+    stop_workers()
+    try:
+        flush_read_marks()
+    except Exception as e:
+        logger.error("Failed to mark processed emails as read: %s", e)
+
+    logger.info("HR Email Agent stopped.")
     return 0
 
 
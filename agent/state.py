@@ -0,0 +1,42 @@
+"""Small persistent key/value store for agent state that must survive restarts."""
+import sqlite3
+import threading
+from pathlib import Path
+
+from config import STATE_DB_PATH
+
+_lock = threading.Lock()
+
+
+def _connect() -> sqlite3.Connection:
+    path = Path(STATE_DB_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE IF NOT EXISTS agent_state (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+    return conn
+
+
+def get_state(key: str):
+    """Return the stored value for key, or None."""
+    with _lock:
+        conn = _connect()
+        try:
+            row = conn.execute("SELECT value FROM agent_state WHERE key = ?", (key,)).fetchone()
+        finally:
+            conn.close()
+    return row[0] if row else None
+
+
+def set_state(key: str, value: str):
+    """Store value under key, replacing any previous value."""
+    with _lock:
+        conn = _connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT INTO agent_state (key, value) VALUES (?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                    (key, value),
+                )
+        finally:
+            conn.close()
@@ -0,0 +1,173 @@
+"""Email processing tasks run by background workers, off the polling loop."""
+import json
+import logging
+import queue
+import threading
+
+from config import SETTINGS
+from hr_agent import create_agent, reset_agent
+from tools.gmail_api import batch_mark_read, read_email
+from tools.hellio_api import check_email_processed, create_notification
+
+logger = logging.getLogger("hr_agent.tasks")
+
+# Jobs are (message_id, kind); None tells a worker to exit
+_email_queue = queue.Queue()
+_workers = []
+
+# Message ids queued or being processed, so repeated polls don't enqueue them twice
+_inflight = set()
+_inflight_lock = threading.Lock()
+
+# Each worker thread keeps one agent and resets its conversation between emails
+_worker_state = threading.local()
+
+# Processed message ids waiting to be marked read in one batchModify call
+_read_buffer = []
+_read_buffer_lock = threading.Lock()
+
+# The polling loop's wake event, set when a worker leaves a read mark to flush
+_loop_wake = {"event": None}
+
+
+def report_error(summary: str):
+    """Persist an error notification so it's visible in the dashboard."""
+    try:
+        create_notification(notification_type="error", summary=summary[:500])
+    except Exception as notify_err:
+        logger.warning("Failed to persist error notification: %s", notify_err)
+
+
+def _worker_agent():
+    """Return the calling worker's agent with an empty conversation."""
+    agent = getattr(_worker_state, "agent", None)
+    if agent is None:
+        agent = _worker_state.agent = create_agent()
+    else:
+        reset_agent(agent)
+    return agent
+
+
+def _run_agent(message_id: str, instructions: str) -> bool:
+    """Run the worker's agent over a single email. Returns True if it was processed.
+
+    The email is read here, before the agent starts, so its content is part of
+    the first prompt instead of costing the agent a read_email tool turn.
+    """
+    try:
+        email = read_email(message_id=message_id)
+        prompt = f"""{instructions}
+Email (already read, do not call read_email):
+{json.dumps(email, ensure_ascii=False)}
+"""
+        result = _worker_agent()(prompt)
+        # The outcome is the processed record the agent wrote (a cache hit), not the reply text
+        processed = check_email_processed(email_id=message_id)["found"]
+        logger.info(
+            "[%s] Agent finished (stop reason: %s), %s", message_id, result.stop_reason,
+            "processed" if processed else "left unread for retry",
+        )
+        logger.debug("[%s] Result: %s", message_id, result)
+        # Only emails the agent marked as processed leave the unread set; wake the
+        # loop to flush the mark now rather than after its next (possibly hour-long) wait
+        if processed:
+            queue_read_mark(message_id)
+            if _loop_wake["event"]:
+                _loop_wake["event"].set()
+        return processed
+    except Exception as e:
+        logger.error("[%s] Error: %s", message_id, e)
+        report_error(f"Agent failed to process email {message_id}: {e}")
+        return False
+
+
+def process_candidate_email(message_id: str) -> bool:
+    """Process an email sent to the candidates address."""
+    return _run_agent(message_id, f"""
+Process the candidate application email with message_id {message_id}.
+Follow the candidate application workflow, mark it as processed when done, then STOP.""")
+
+
+def process_job_email(message_id: str) -> bool:
+    """Process an email sent to the positions address."""
+    return _run_agent(message_id, f"""
+Process the job posting email with message_id {message_id}.
+Follow the job posting workflow, mark it as processed when done, then STOP.""")
+
+
+TASKS = {
+    "candidate": process_candidate_email,
+    "position": process_job_email,
+}
+
+
+def enqueue(message_id: str, kind: str) -> bool:
+    """Queue an email for processing. Returns False if it is already queued."""
+    with _inflight_lock:
+        if message_id in _inflight:
+            return False
+        _inflight.add(message_id)
+    _email_queue.put((message_id, kind))
+    return True
+
+
+def queue_read_mark(message_id: str):
+    """Mark an email as read with the next flush_read_marks() call."""
+    with _read_buffer_lock:
+        _read_buffer.append(message_id)
+
+
+def flush_read_marks() -> int:
+    """Mark every processed email since the last flush as read. Returns the count."""
+    with _read_buffer_lock:
+        message_ids = list(_read_buffer)
+        _read_buffer.clear()
+    try:
+        return batch_mark_read(message_ids)
+    except Exception:
+        with _read_buffer_lock:
+            _read_buffer.extend(message_ids)
+        raise
+
+
+def _worker():
+    while True:
+        job = _email_queue.get()
+        if job is None:
+            break
+        message_id, kind = job
+        try:
+            TASKS[kind](message_id)
+        finally:
+            with _inflight_lock:
+                _inflight.discard(message_id)
+
+
+def start_workers(wake: threading.Event = None, count: int = SETTINGS.email_workers):
+    """Start the background workers that drain the email queue.
+
+    wake, if given, is set whenever a worker queues a read mark for flush_read_marks().
+    """
+    _loop_wake["event"] = wake
+    for i in range(count):
+        worker = threading.Thread(target=_worker, name=f"email-worker-{i}", daemon=True)
+        worker.start()
+        _workers.append(worker)
+
+
+def stop_workers():
+    """Let workers finish the email in hand, then stop them.
+
+    Emails still waiting in the queue are dropped; they stay unread in Gmail
+    and are picked up again on the next start.
+    """
+    while True:
+        try:
+            _email_queue.get_nowait()
+        except queue.Empty:
+            break
+    for _ in _workers:
+        _email_queue.put(None)
+    for worker in _workers:
+        worker.join()
+    _workers.clear()
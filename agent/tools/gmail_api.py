@@ -1,27 +1,62 @@
 """Gmail API tools for Strands agent."""
 import os
 import json
+import logging
 import time
 import base64
+import functools
+import html
+import re
+import ssl
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from email.message import EmailMessage
+from email.policy import SMTP as SMTP_POLICY
 from pathlib import Path
 from strands import tool
+from google.auth.exceptions import RefreshError
+from google.auth.transport.requests import Request as GoogleAuthRequest
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+
+from config import UNREAD_QUERY
 
 # Gmail credentials paths (used by gmail-mcp server)
 GMAIL_MCP_DIR = Path(os.getenv("GMAIL_MCP_DIR", str(Path.home() / ".gmail-mcp")))
 CREDENTIALS_PATH = GMAIL_MCP_DIR / "credentials.json"
 OAUTH_KEYS_PATH = GMAIL_MCP_DIR / "gcp-oauth.keys.json"
 
-# Cache for Gmail service
-_service_cache = {"service": None}
+logger = logging.getLogger("hr_agent.gmail")
 
+# users.messages.batchModify accepts at most this many ids per call
+BATCH_MODIFY_LIMIT = 1000
+# A Gmail batch HTTP request carries at most this many calls
+BATCH_REQUEST_LIMIT = 100
+# Concurrent single gets for messages a batch request failed to return
+FALLBACK_FETCH_WORKERS = 10
+# Base64 characters decoded per write when saving attachments (a multiple of 4)
+ATTACHMENT_DECODE_CHUNK = 64 * 1024
 
-def get_gmail_service(force_refresh: bool = False):
-    """Get authenticated Gmail API service."""
-    if _service_cache["service"] and not force_refresh:
-        return _service_cache["service"]
+# Failures worth another attempt on a fresh connection: dropped or broken TLS
+# connections, expired/revoked auth, and transient server-side errors. Calls
+# that aren't idempotent only retry the first two, since a 5xx may come after
+# the change was made.
+RETRYABLE_ERRORS = (ssl.SSLError, ConnectionError, TimeoutError, RefreshError)
+AUTH_RETRY_STATUSES = {401}
+SERVER_RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Per-thread cache for Gmail service (httplib2 connections are not thread-safe)
+_service_cache = threading.local()
 
+# One Credentials object shared by every thread's service and by get_access_token,
+# so the OAuth token is refreshed once for the process rather than once per thread
+_credentials = {"creds": None}
+_credentials_lock = threading.Lock()
+
+
+def _load_credentials() -> Credentials:
+    """Build OAuth credentials from the gmail-mcp token and client key files."""
     if not CREDENTIALS_PATH.exists():
         raise RuntimeError(f"Gmail credentials not found at {CREDENTIALS_PATH}")
 
@@ -41,7 +76,7 @@ def get_gmail_service(force_refresh: bool = False):
             client_secret = creds_section.get("client_secret")
 
     # Build credentials object
-    creds = Credentials(
+    return Credentials(
         token=token_data.get("access_token") or token_data.get("token"),
         refresh_token=token_data.get("refresh_token"),
         token_uri="https://oauth2.googleapis.com/token",
@@ -50,62 +85,269 @@ def get_gmail_service(force_refresh: bool = False):
         scopes=token_data.get("scopes") or ["https://www.googleapis.com/auth/gmail.modify"],
     )
 
-    service = build("gmail", "v1", credentials=creds)
-    _service_cache["service"] = service
+
+def _shared_credentials() -> Credentials:
+    """Return the process-wide credentials, refreshed if they have expired."""
+    with _credentials_lock:
+        creds = _credentials["creds"]
+        if creds is None:
+            creds = _credentials["creds"] = _load_credentials()
+        # The stored token has no known expiry, so refresh it once before first use
+        if creds.expiry is None or creds.expired:
+            creds.refresh(GoogleAuthRequest())
+        return creds
+
+
+def get_gmail_service(force_refresh: bool = False):
+    """Get authenticated Gmail API service for the calling thread.
+
+    Each thread gets its own HTTP connection; all of them share one set of credentials.
+    """
+    service = getattr(_service_cache, "service", None)
+    if service and not force_refresh:
+        return service
+
+    service = build("gmail", "v1", credentials=_shared_credentials())
+    _service_cache.service = service
     return service
 
 
-def _gmail_call_with_retry(fn, max_retries=2):
-    """Execute a Gmail API call with SSL retry logic."""
-    for attempt in range(max_retries):
+def get_access_token() -> str:
+    """Return a fresh OAuth access token for handing Gmail reads to the Hellio API."""
+    return _shared_credentials().token
+
+
+def _is_retryable(error: Exception, idempotent: bool) -> bool:
+    """Whether a failed Gmail call is worth retrying on a fresh connection."""
+    if isinstance(error, HttpError):
+        return error.resp.status in AUTH_RETRY_STATUSES or (
+            idempotent and error.resp.status in SERVER_RETRY_STATUSES
+        )
+    return isinstance(error, RETRYABLE_ERRORS)
+
+
+def with_gmail_retry(attempts: int = 2, idempotent: bool = True):
+    """Decorator: call fn(service, *args, **kwargs) with the thread's Gmail service.
+
+    On a retryable error the service is rebuilt (and the credentials reloaded
+    after an auth failure) and the call tried again, up to attempts times in
+    total, with exponential backoff. Pass idempotent=False for calls that must
+    not be repeated after a server error.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            for attempt in range(attempts):
+                try:
+                    return fn(get_gmail_service(force_refresh=attempt > 0), *args, **kwargs)
+                except Exception as e:
+                    if attempt == attempts - 1 or not _is_retryable(e, idempotent):
+                        raise
+                    logger.warning("Gmail call %s failed (%s), retrying with a fresh connection...", fn.__name__, e)
+                    if isinstance(e, RefreshError) or (isinstance(e, HttpError) and e.resp.status == 401):
+                        with _credentials_lock:
+                            _credentials["creds"] = None
+                    time.sleep(0.2 * 2 ** attempt)
+        return wrapper
+    return decorator
+
+
+def _decode_body(data: str) -> str:
+    """Decode a base64url MIME part body to text."""
+    return base64.urlsafe_b64decode(data).decode("utf-8", errors="ignore")
+
+
+def _html_to_text(markup: str) -> str:
+    """Crude HTML to text for emails with no text/plain part."""
+    markup = re.sub(r"(?is)<(script|style)\b.*?</\1>", "", markup)
+    markup = re.sub(r"(?i)<br\s*/?>|</p>|</div>|</li>|</tr>", "\n", markup)
+    text = html.unescape(re.sub(r"<[^>]+>", "", markup))
+    return re.sub(r"\n\s*\n+", "\n\n", text).strip()
+
+
+def _metadata_request(service, message_id: str):
+    """Build the messages.get request for a message's summary headers."""
+    return service.users().messages().get(
+        userId="me", id=message_id, format="metadata",
+        metadataHeaders=["Subject", "From", "Date", "To"],
+        fields="payload/headers",
+    )
+
+
+def _get_metadata_or_none(message_id: str):
+    """Get one message's metadata on this thread's service; None if the message is gone."""
+    try:
+        return _metadata_request(get_gmail_service(), message_id).execute()
+    except HttpError as e:
+        if e.resp.status == 404:
+            return None
+        raise
+
+
+def _fetch_metadata_concurrently(message_ids: list) -> list:
+    """Get message metadata with parallel single requests, one Gmail service per thread.
+
+    Deleted messages (still listed in history deltas) come back as None.
+    """
+    with ThreadPoolExecutor(max_workers=min(FALLBACK_FETCH_WORKERS, len(message_ids))) as pool:
+        return list(pool.map(_get_metadata_or_none, message_ids))
+
+
+def _fetch_summaries(service, message_ids: list) -> list:
+    """Fetch subject/from/to/date for each message id.
+
+    The gets go out as multipart batch requests (one HTTP round trip per
+    BATCH_REQUEST_LIMIT ids) instead of one request per message. Messages a
+    batch fails to return (per-call errors such as rate limiting, or the whole
+    batch failing) are fetched again with concurrent single requests. Messages
+    deleted since they were listed are left out.
+    """
+    responses = {}
+
+    def _collect(request_id, response, exception):
+        if exception is None:
+            responses[request_id] = response
+
+    message_ids = list(dict.fromkeys(message_ids))
+    for i in range(0, len(message_ids), BATCH_REQUEST_LIMIT):
+        batch = service.new_batch_http_request(callback=_collect)
+        for message_id in message_ids[i:i + BATCH_REQUEST_LIMIT]:
+            batch.add(_metadata_request(service, message_id), request_id=message_id)
         try:
-            return fn(get_gmail_service(force_refresh=(attempt > 0)))
+            batch.execute()
         except Exception as e:
-            if attempt < max_retries - 1 and "SSL" in str(e):
-                print(f"[gmail] SSL error, retrying with fresh connection...")
-                time.sleep(1)
-                continue
-            raise
+            logger.warning("Batch metadata request failed, falling back to single gets: %s", e)
+
+    missing = [message_id for message_id in message_ids if message_id not in responses]
+    if missing:
+        responses.update(zip(missing, _fetch_metadata_concurrently(missing)))
+
+    emails = []
+    for message_id in message_ids:
+        msg_data = responses[message_id]
+        if msg_data is None:
+            logger.info("Message %s no longer exists, skipping it", message_id)
+            continue
+        headers = {h["name"]: h["value"] for h in msg_data.get("payload", {}).get("headers", [])}
+        emails.append({
+            "id": message_id,
+            "subject": headers.get("Subject", ""),
+            "from": headers.get("From", ""),
+            "to": headers.get("To", ""),
+            "date": headers.get("Date", ""),
+        })
+    return emails
+
+
+def get_email_summaries(message_ids: list) -> list:
+    """Fetch summaries for known message ids (plain helper, not a tool)."""
+    return with_gmail_retry()(_fetch_summaries)(message_ids)
+
+
+def get_history_id() -> str:
+    """Return the mailbox's current historyId (plain helper, not a tool)."""
+    @with_gmail_retry()
+    def _do(service):
+        return service.users().getProfile(userId="me").execute()["historyId"]
+
+    return _do()
+
+
+def list_new_message_ids(start_history_id: str) -> tuple:
+    """List messages added to the inbox since start_history_id (plain helper).
+
+    Returns (message_ids, new_history_id). new_history_id is None when Gmail no
+    longer has history that old, in which case the caller must do a full sync.
+    """
+    @with_gmail_retry()
+    def _do(service):
+        message_ids = []
+        page_token = None
+        while True:
+            response = service.users().history().list(
+                userId="me",
+                startHistoryId=start_history_id,
+                historyTypes=["messageAdded"],
+                labelId="INBOX",
+                pageToken=page_token,
+                fields="history/messagesAdded/message/id,nextPageToken,historyId",
+            ).execute()
+            for record in response.get("history", []):
+                for added in record.get("messagesAdded", []):
+                    message_id = added["message"]["id"]
+                    if message_id not in message_ids:
+                        message_ids.append(message_id)
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                return message_ids, response["historyId"]
+
+    try:
+        return _do()
+    except HttpError as e:
+        if e.resp.status == 404:
+            return [], None
+        raise
 
 
 @tool
-def search_emails(query: str, max_results: int = 10) -> list:
+def search_emails(query: str = None, max_results: int = 5) -> list:
     """
     Search for emails using Gmail search syntax.
 
     Args:
-        query: Gmail search query (e.g., 'is:unread to:myemail+candidates@gmail.com')
+        query: Gmail search query (e.g., 'is:unread to:myemail+candidates@gmail.com').
+            Defaults to unread mail sent to either HR address.
         max_results: Maximum number of results to return
 
     Returns:
-        List of email summaries with id, subject, from, date
+        List of email summaries with id, subject, from, to, date
     """
+    @with_gmail_retry()
     def _do(service):
         results = service.users().messages().list(
-            userId="me", q=query, maxResults=max_results
+            userId="me", q=query or UNREAD_QUERY, maxResults=max_results, fields="messages/id"
         ).execute()
 
-        messages = results.get("messages", [])
-        emails = []
+        message_ids = [msg["id"] for msg in results.get("messages", [])]
+        return _fetch_summaries(service, message_ids)
 
-        for msg in messages:
-            msg_data = service.users().messages().get(
-                userId="me", id=msg["id"], format="metadata",
-                metadataHeaders=["Subject", "From", "Date", "To"]
-            ).execute()
+    return _do()
+
+
+def search_unread_page(max_results: int, page_token: str = None) -> tuple:
+    """Return (summaries, next_page_token) for one page of the unread HR search (plain helper).
+
+    next_page_token is None on the last page.
+    """
+    @with_gmail_retry()
+    def _do(service):
+        results = service.users().messages().list(
+            userId="me", q=UNREAD_QUERY, maxResults=max_results, pageToken=page_token,
+            fields="messages/id,nextPageToken",
+        ).execute()
+
+        message_ids = [msg["id"] for msg in results.get("messages", [])]
+        return _fetch_summaries(service, message_ids), results.get("nextPageToken")
+
+    return _do()
+
+
+@tool
+def list_unprocessed_emails(max_results: int = 5) -> list:
+    """
+    List unread HR emails that have not been processed yet.
 
-            headers = {h["name"]: h["value"] for h in msg_data.get("payload", {}).get("headers", [])}
-            emails.append({
-                "id": msg["id"],
-                "subject": headers.get("Subject", ""),
-                "from": headers.get("From", ""),
-                "to": headers.get("To", ""),
-                "date": headers.get("Date", ""),
-            })
+    Args:
+        max_results: Maximum number of unread emails to look at
 
-        return emails
+    Returns:
+        List of email summaries with id, subject, from, to, date
+    """
+    from tools.hellio_api import check_email_processed, preload_processed
 
-    return _gmail_call_with_retry(_do)
+    emails = search_emails(max_results=max_results)
+    preload_processed([email["id"] for email in emails])
+    return [email for email in emails if not check_email_processed(email_id=email["id"])["found"]]
 
 
 @tool
@@ -119,37 +361,41 @@ def read_email(message_id: str) -> dict:
     Returns:
         Email with subject, from, to, date, body, and attachments list
     """
+    @with_gmail_retry()
     def _do(service):
         msg = service.users().messages().get(userId="me", id=message_id, format="full").execute()
 
         headers = {h["name"]: h["value"] for h in msg.get("payload", {}).get("headers", [])}
 
-        # Extract body
+        # Walk the MIME tree in document order: first text/plain part is the
+        # body (first text/html as fallback), named leaves are attachments
         body = ""
+        html_body = ""
         attachments = []
-
-        def extract_parts(payload):
-            nonlocal body
-            if "parts" in payload:
-                for part in payload["parts"]:
-                    extract_parts(part)
-            else:
-                mime_type = payload.get("mimeType", "")
-                if mime_type == "text/plain" and "data" in payload.get("body", {}):
-                    body = base64.urlsafe_b64decode(payload["body"]["data"]).decode("utf-8", errors="ignore")
-                elif "filename" in payload and payload["filename"]:
-                    attachments.append({
-                        "filename": payload["filename"],
-                        "mimeType": mime_type,
-                        "attachmentId": payload["body"].get("attachmentId", ""),
-                        "size": payload["body"].get("size", 0),
-                    })
-
-        extract_parts(msg.get("payload", {}))
-
-        # If no plain text, try to get from body directly
-        if not body and "data" in msg.get("payload", {}).get("body", {}):
-            body = base64.urlsafe_b64decode(msg["payload"]["body"]["data"]).decode("utf-8", errors="ignore")
+        stack = [msg.get("payload", {})]
+        while stack:
+            part = stack.pop()
+            children = part.get("parts")
+            if children:
+                stack.extend(reversed(children))
+                continue
+            mime_type = part.get("mimeType", "")
+            part_body = part.get("body") or {}
+            if part.get("filename"):
+                attachments.append({
+                    "filename": part["filename"],
+                    "mimeType": mime_type,
+                    "attachmentId": part_body.get("attachmentId", ""),
+                    "size": part_body.get("size", 0),
+                })
+            elif "data" in part_body:
+                if mime_type == "text/plain" and not body:
+                    body = _decode_body(part_body["data"])
+                elif mime_type == "text/html" and not html_body:
+                    html_body = _decode_body(part_body["data"])
+
+        if not body and html_body:
+            body = _html_to_text(html_body)
 
         return {
             "id": message_id,
@@ -161,29 +407,29 @@ def read_email(message_id: str) -> dict:
             "attachments": attachments,
         }
 
-    return _gmail_call_with_retry(_do)
+    return _do()
 
 
 def download_attachment_to_disk(message_id: str, attachment_id: str, filename: str, save_path: str = "/tmp") -> str:
-    """Download an email attachment to disk (plain helper, not a tool).
-
-    Used by download_and_ingest_cv to avoid parallel tool call issues.
-    """
+    """Download an email attachment to disk (plain helper behind download_attachment)."""
+    @with_gmail_retry()
     def _do(service):
         attachment = service.users().messages().attachments().get(
             userId="me", messageId=message_id, id=attachment_id
         ).execute()
 
         data = attachment.get("data", "")
-        file_bytes = base64.urlsafe_b64decode(data)
 
+        # Decode in chunks so the file never exists twice in memory; Gmail may omit the padding
         file_path = Path(save_path) / filename
         with open(file_path, "wb") as f:
-            f.write(file_bytes)
+            for i in range(0, len(data), ATTACHMENT_DECODE_CHUNK):
+                chunk = data[i:i + ATTACHMENT_DECODE_CHUNK]
+                f.write(base64.urlsafe_b64decode(chunk + "=" * (-len(chunk) % 4)))
 
         return str(file_path)
 
-    return _gmail_call_with_retry(_do)
+    return _do()
 
 
 @tool
@@ -217,16 +463,16 @@ def create_draft(to: str, subject: str, body: str, reply_to_message_id: str = No
     Returns:
         Created draft info with id
     """
-    import email.mime.text
-
-    print(f"[create_draft] Creating draft to={to}, subject={subject[:50]}...")
+    logger.info("Creating draft to=%s, subject=%.50s...", to, subject)
 
+    @with_gmail_retry(idempotent=False)
     def _do(service):
-        message = email.mime.text.MIMEText(body)
-        message["to"] = to
-        message["subject"] = subject
+        message = EmailMessage(policy=SMTP_POLICY)
+        message["To"] = to
+        message["Subject"] = subject
+        message.set_content(body)
 
-        raw = base64.urlsafe_b64encode(message.as_bytes()).decode("utf-8")
+        raw = base64.urlsafe_b64encode(bytes(message)).decode("ascii")
 
         draft_body = {"message": {"raw": raw}}
         if reply_to_message_id:
@@ -234,35 +480,47 @@ def create_draft(to: str, subject: str, body: str, reply_to_message_id: str = No
 
         draft = service.users().drafts().create(userId="me", body=draft_body).execute()
 
-        print(f"[create_draft] SUCCESS: draft_id={draft['id']}")
+        logger.info("Draft created: draft_id=%s", draft["id"])
         return {
             "id": draft["id"],
             "message_id": draft["message"]["id"],
         }
 
     try:
-        return _gmail_call_with_retry(_do)
+        return _do()
     except Exception as e:
-        print(f"[create_draft] ERROR: {e}")
+        logger.error("create_draft failed: %s", e)
         return {"error": str(e)}
 
 
+def batch_mark_read(message_ids: list) -> int:
+    """Remove the UNREAD label from many messages with batchModify (plain helper).
+
+    Returns the number of messages updated.
+    """
+    @with_gmail_retry()
+    def _do(service):
+        for i in range(0, len(message_ids), BATCH_MODIFY_LIMIT):
+            service.users().messages().batchModify(
+                userId="me",
+                body={"ids": message_ids[i:i + BATCH_MODIFY_LIMIT], "removeLabelIds": ["UNREAD"]}
+            ).execute()
+        return len(message_ids)
+
+    if not message_ids:
+        return 0
+    return _do()
+
+
 @tool
-def mark_email_as_read(message_id: str) -> dict:
+def mark_emails_as_read(message_ids: list) -> dict:
     """
-    Mark an email as read by removing UNREAD label.
+    Mark several emails as read in a single request.
 
     Args:
-        message_id: Gmail message ID
+        message_ids: Gmail message IDs
 
     Returns:
-        Updated message info
+        Number of messages updated
     """
-    def _do(service):
-        result = service.users().messages().modify(
-            userId="me", id=message_id,
-            body={"removeLabelIds": ["UNREAD"]}
-        ).execute()
-        return {"id": result["id"], "labels": result.get("labelIds", [])}
-
-    return _gmail_call_with_retry(_do)
+    return {"updated": batch_mark_read(message_ids)}
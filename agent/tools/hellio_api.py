@@ -1,24 +1,145 @@
 """Tools for interacting with Hellio HR API."""
+import base64
+import io
+import json
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
+from requests_toolbelt import MultipartEncoder
+from urllib3.util.retry import Retry
 from strands import tool
 from config import API_BASE_URL, API_EMAIL, API_PASSWORD
 
-# Cache for auth token
-_token_cache = {"token": None}
+# (connect, read) timeouts; ingestion runs parsing + LLM extraction server-side
+TIMEOUT = (3, 30)
+INGEST_TIMEOUT = (3, 120)
+
+# Shared keep-alive session so tool calls reuse pooled connections to the API.
+# Idempotent requests are retried on gateway errors; POSTs are never retried.
+# Once retries run out the last response is returned, so callers still see the status.
+_session = requests.Session()
+_session.mount(API_BASE_URL, HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=[502, 503, 504], raise_on_status=False),
+))
+
+# Cache for auth token, refreshed shortly before the JWT's exp claim
+TOKEN_EXPIRY_MARGIN = 30
+_token_cache = {"token": None, "exp": 0}
+_token_lock = threading.Lock()
+
+# Cache for check_email_processed: email_id -> (expires_at, {"found", "emailId"}).
+# Unread mail is seen again every cycle until it is marked read. Processed
+# records never change, so hits are kept far longer than misses. Only answers
+# the API confirmed (a record, a 404, or a bulk-check result) are ever cached;
+# failed lookups raise instead, so an outage can't hide an email for a month.
+PROCESSED_CACHE_TTL = 30 * 24 * 60 * 60
+PROCESSED_MISS_TTL = 3600
+PROCESSED_CACHE_SIZE = 4096
+# Ids per processed-emails bulk-check request (the API's limit)
+PROCESSED_LOOKUP_CHUNK = 1000
+_processed_cache = {}
+_processed_cache_lock = threading.Lock()
+
+# Short-lived cache for the full position/candidate lists: name -> (expires_at, data).
+# Cleared when an ingestion adds to the matching list. List items are the same
+# objects the detail endpoints return, so detail lookups are served from here too.
+LIST_CACHE_TTL = 60
+_list_cache = {}
+_list_cache_lock = threading.Lock()
+
+# Which cached list an upload type adds to
+_UPLOAD_INVALIDATES = {"cv": "candidates", "job": "positions"}
+
+
+def _cache_processed(email_id: str, found: bool) -> dict:
+    """Store and return a check_email_processed result, evicting the oldest entry when full.
+
+    Every lookup path caches this same shape, whichever endpoint answered.
+    """
+    result = {"found": found, "emailId": email_id}
+    with _processed_cache_lock:
+        _processed_cache.pop(email_id, None)
+        if len(_processed_cache) >= PROCESSED_CACHE_SIZE:
+            _processed_cache.pop(next(iter(_processed_cache)))
+        ttl = PROCESSED_CACHE_TTL if found else PROCESSED_MISS_TTL
+        _processed_cache[email_id] = (time.monotonic() + ttl, result)
+    return result
+
+
+def _cached_processed(email_id: str):
+    """Return the cached check_email_processed result, or None if absent or stale."""
+    with _processed_cache_lock:
+        cached = _processed_cache.get(email_id)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+    return None
+
+
+def preload_processed(email_ids: list):
+    """Fill the processed cache for many emails with bulk lookups (plain helper, not a tool).
+
+    Ids already cached are skipped; later check_email_processed calls for these
+    ids are answered from memory.
+    """
+    missing = [email_id for email_id in dict.fromkeys(email_ids) if _cached_processed(email_id) is None]
+    for i in range(0, len(missing), PROCESSED_LOOKUP_CHUNK):
+        chunk = missing[i:i + PROCESSED_LOOKUP_CHUNK]
+        response = _api("POST", "/api/agent/processed-emails/bulk-check", json={"ids": chunk})
+        response.raise_for_status()
+        processed = set(response.json()["processed"])
+        for email_id in chunk:
+            _cache_processed(email_id, email_id in processed)
+
+
+def _cached_list(name: str, path: str) -> list:
+    """GET a list endpoint, serving repeat calls within LIST_CACHE_TTL from memory."""
+    with _list_cache_lock:
+        cached = _list_cache.get(name)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+
+    response = _api("GET", path)
+    data = response.json()
+    if response.ok:
+        with _list_cache_lock:
+            _list_cache[name] = (time.monotonic() + LIST_CACHE_TTL, data)
+    return data
+
+
+def _cached_list_item(name: str, item_id: str):
+    """Return an item from a fresh cached list by id, or None to fall back to the API."""
+    with _list_cache_lock:
+        cached = _list_cache.get(name)
+    if not cached or cached[0] <= time.monotonic() or not isinstance(cached[1], list):
+        return None
+    return next((item for item in cached[1] if item.get("id") == item_id), None)
+
+
+def _jwt_exp(token: str) -> int:
+    """Read the exp claim (epoch seconds) from a JWT without verifying it."""
+    payload = token.split(".")[1]
+    return json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))["exp"]
 
 
 def get_auth_token() -> str:
     """Get or refresh auth token."""
-    if _token_cache["token"]:
-        return _token_cache["token"]
-
-    response = requests.post(
-        f"{API_BASE_URL}/api/auth/login",
-        json={"email": API_EMAIL, "password": API_PASSWORD}
-    )
-    response.raise_for_status()
-    _token_cache["token"] = response.json()["token"]
-    return _token_cache["token"]
+    with _token_lock:
+        if _token_cache["token"] and time.time() < _token_cache["exp"] - TOKEN_EXPIRY_MARGIN:
+            return _token_cache["token"]
+
+        response = _session.post(
+            f"{API_BASE_URL}/api/auth/login",
+            json={"email": API_EMAIL, "password": API_PASSWORD},
+            timeout=TIMEOUT
+        )
+        response.raise_for_status()
+        token = response.json()["token"]
+        _token_cache["token"] = token
+        _token_cache["exp"] = _jwt_exp(token)
+        return token
 
 
 def auth_headers() -> dict:
@@ -26,20 +147,65 @@ def auth_headers() -> dict:
     return {"Authorization": f"Bearer {get_auth_token()}"}
 
 
-def _upload_file(file_path: str, filename: str, upload_type: str) -> dict:
-    """Upload a file through the ingestion pipeline."""
-    with open(file_path, "rb") as f:
-        file_content = f.read()
+def _api(method: str, path: str, multipart: dict = None, **kwargs) -> requests.Response:
+    """Send an authenticated API request, logging in again once if the token is rejected.
 
-    response = requests.post(
-        f"{API_BASE_URL}/api/ingestion/upload",
+    multipart fields ({name: (filename, file_obj)}) are streamed
+    from their file objects, which are rewound for the retry.
+    """
+    kwargs.setdefault("timeout", TIMEOUT)
+    for attempt in range(2):
+        headers = auth_headers()
+        if multipart:
+            for _, file_obj in multipart.values():
+                file_obj.seek(0)
+            encoder = MultipartEncoder(fields=multipart)
+            headers["Content-Type"] = encoder.content_type
+            kwargs["data"] = encoder
+        response = _session.request(method, f"{API_BASE_URL}{path}", headers=headers, **kwargs)
+        if response.status_code != 401 or attempt:
+            return response
+        with _token_lock:
+            _token_cache["token"] = None
+
+
+def _upload_stream(file_obj, filename: str, upload_type: str) -> dict:
+    """Stream a file object through the ingestion pipeline."""
+    response = _api(
+        "POST",
+        "/api/ingestion/upload",
+        # No part Content-Type, as with requests' files=; the backend stores what it receives
+        multipart={"file": (filename, file_obj)},
         params={"type": upload_type},
-        files={"file": (filename, file_content)},
-        headers=auth_headers()
+        timeout=INGEST_TIMEOUT
     )
+    if response.ok:
+        with _list_cache_lock:
+            _list_cache.pop(_UPLOAD_INVALIDATES[upload_type], None)
     return response.json()
 
 
+def _upload_bytes(file_content: bytes, filename: str, upload_type: str) -> dict:
+    """Upload in-memory file content through the ingestion pipeline."""
+    return _upload_stream(io.BytesIO(file_content), filename, upload_type)
+
+
+def _upload_file(file_path: str, filename: str, upload_type: str) -> dict:
+    """Upload a file on disk through the ingestion pipeline, read in chunks as it is sent."""
+    with open(file_path, "rb") as f:
+        return _upload_stream(f, filename, upload_type)
+
+
+def ingest_cv_bytes(file_bytes: bytes, filename: str) -> dict:
+    """Ingest a CV held in memory (plain helper, not a tool)."""
+    return _upload_bytes(file_bytes, filename, "cv")
+
+
+def ingest_job_bytes(file_bytes: bytes, filename: str) -> dict:
+    """Ingest a job posting held in memory (plain helper, not a tool)."""
+    return _upload_bytes(file_bytes, filename, "job")
+
+
 @tool
 def ingest_cv(file_path: str, filename: str) -> dict:
     """
@@ -69,9 +235,24 @@ def download_and_ingest_cv(message_id: str, attachment_id: str, filename: str) -
     Returns:
         dict with candidateId, candidateName, status, and candidateSummary
     """
-    from tools.gmail_api import download_attachment_to_disk
-    file_path = download_attachment_to_disk(message_id, attachment_id, filename)
-    return _upload_file(file_path, filename, "cv")
+    # Hellio fetches the attachment from Gmail itself, so the file never passes through the agent
+    from tools.gmail_api import get_access_token
+    response = _api(
+        "POST",
+        "/api/ingestion/upload-from-gmail",
+        params={"type": "cv"},
+        json={
+            "messageId": message_id,
+            "attachmentId": attachment_id,
+            "fileName": filename,
+            "accessToken": get_access_token(),
+        },
+        timeout=INGEST_TIMEOUT
+    )
+    if response.ok:
+        with _list_cache_lock:
+            _list_cache.pop("candidates", None)
+    return response.json()
 
 
 @tool
@@ -90,23 +271,18 @@ def ingest_job(file_path: str, filename: str) -> dict:
 
 
 @tool
-def save_email_as_text(email_body: str, filename: str, save_path: str = "/tmp") -> str:
+def ingest_job_text(email_body: str, filename: str = "job_posting.txt") -> dict:
     """
-    Save email body text to a file for ingestion (used for job postings in email body).
+    Ingest a job posting written in an email body, without saving it to disk first.
 
     Args:
         email_body: The email body text content
-        filename: Filename to save as (e.g., 'job_posting.txt')
-        save_path: Directory to save the file (default: /tmp)
+        filename: Name to store the posting under (default: job_posting.txt)
 
     Returns:
-        Full path to the saved file
+        dict with positionId, status, and positionSummary
     """
-    import os
-    file_path = os.path.join(save_path, filename)
-    with open(file_path, "w") as f:
-        f.write(email_body)
-    return file_path
+    return ingest_job_bytes(email_body.encode("utf-8"), filename)
 
 
 @tool
@@ -134,8 +310,9 @@ def create_notification(
     Returns:
         Created notification record
     """
-    response = requests.post(
-        f"{API_BASE_URL}/api/agent/notifications",
+    response = _api(
+        "POST",
+        "/api/agent/notifications",
         json={
             "type": notification_type,
             "summary": summary,
@@ -144,8 +321,7 @@ def create_notification(
             "positionId": position_id,
             "draftId": draft_id,
             "metadata": metadata
-        },
-        headers=auth_headers()
+        }
     )
     return response.json()
 
@@ -175,8 +351,9 @@ def mark_email_processed(
     Returns:
         Processed email record
     """
-    response = requests.post(
-        f"{API_BASE_URL}/api/agent/processed-emails",
+    response = _api(
+        "POST",
+        "/api/agent/processed-emails",
         json={
             "emailId": email_id,
             "emailType": email_type,
@@ -185,10 +362,12 @@ def mark_email_processed(
             "candidateId": candidate_id,
             "positionId": position_id,
             "draftId": draft_id
-        },
-        headers=auth_headers()
+        }
     )
-    return response.json()
+    record = response.json()
+    if response.ok:
+        _cache_processed(email_id, True)
+    return record
 
 
 @tool
@@ -200,15 +379,36 @@ def check_email_processed(email_id: str) -> dict:
         email_id: Gmail message ID
 
     Returns:
-        Processed email record if found, or {"found": false}
+        {"found": true/false, "emailId": email_id}
     """
-    response = requests.get(
-        f"{API_BASE_URL}/api/agent/processed-emails/{email_id}",
-        headers=auth_headers()
-    )
-    if response.status_code == 404:
-        return {"found": False}
-    return {"found": True, **response.json()}
+    cached = _cached_processed(email_id)
+    if cached is not None:
+        return cached
+
+    response = _api("GET", f"/api/agent/processed-emails/{email_id}")
+    # Only a definite answer is cached; any other error must not read as "processed"
+    if response.status_code != 404:
+        response.raise_for_status()
+    return _cache_processed(email_id, response.status_code != 404)
+
+
+@tool
+def check_emails_processed(email_ids: list) -> dict:
+    """
+    Check which of several emails have already been processed, in one request.
+
+    Args:
+        email_ids: Gmail message IDs
+
+    Returns:
+        {"processed": [ids already processed], "unprocessed": [ids still to handle]}
+    """
+    preload_processed(email_ids)
+    result = {"processed": [], "unprocessed": []}
+    for email_id in dict.fromkeys(email_ids):
+        found = check_email_processed(email_id=email_id)["found"]
+        result["processed" if found else "unprocessed"].append(email_id)
+    return result
 
 
 @tool
@@ -219,11 +419,7 @@ def get_positions() -> list:
     Returns:
         List of position objects with title, company, skills, requirements
     """
-    response = requests.get(
-        f"{API_BASE_URL}/api/positions",
-        headers=auth_headers()
-    )
-    return response.json()
+    return _cached_list("positions", "/api/positions")
 
 
 @tool
@@ -234,11 +430,7 @@ def get_candidates() -> list:
     Returns:
         List of candidate objects with name, email, skills, experience
     """
-    response = requests.get(
-        f"{API_BASE_URL}/api/candidates",
-        headers=auth_headers()
-    )
-    return response.json()
+    return _cached_list("candidates", "/api/candidates")
 
 
 @tool
@@ -252,10 +444,7 @@ def suggest_candidates_for_position(position_id: str) -> list:
     Returns:
         List of up to 3 matching candidates with similarity scores
     """
-    response = requests.get(
-        f"{API_BASE_URL}/api/positions/{position_id}/suggest-candidates",
-        headers=auth_headers()
-    )
+    response = _api("GET", f"/api/positions/{position_id}/suggest-candidates")
     if response.status_code != 200:
         return []
     return response.json()
@@ -272,10 +461,7 @@ def suggest_positions_for_candidate(candidate_id: str) -> list:
     Returns:
         List of up to 3 matching positions with similarity scores and explanations
     """
-    response = requests.get(
-        f"{API_BASE_URL}/api/candidates/{candidate_id}/suggest-positions",
-        headers=auth_headers()
-    )
+    response = _api("GET", f"/api/candidates/{candidate_id}/suggest-positions")
     if response.status_code != 200:
         return []
     return response.json()
@@ -292,10 +478,11 @@ def get_candidate_details(candidate_id: str) -> dict:
     Returns:
         Full candidate object with all details
     """
-    response = requests.get(
-        f"{API_BASE_URL}/api/candidates/{candidate_id}",
-        headers=auth_headers()
-    )
+    cached = _cached_list_item("candidates", candidate_id)
+    if cached is not None:
+        return cached
+
+    response = _api("GET", f"/api/candidates/{candidate_id}")
     if response.status_code == 404:
         return {"error": "Candidate not found"}
     return response.json()
@@ -312,10 +499,11 @@ def get_position_details(position_id: str) -> dict:
     Returns:
         Full position object with all details
     """
-    response = requests.get(
-        f"{API_BASE_URL}/api/positions/{position_id}",
-        headers=auth_headers()
-    )
+    cached = _cached_list_item("positions", position_id)
+    if cached is not None:
+        return cached
+
+    response = _api("GET", f"/api/positions/{position_id}")
     if response.status_code == 404:
         return {"error": "Position not found"}
     return response.json()
@@ -0,0 +1,130 @@
+"""Email reply templates, fetched by the agent on demand instead of living in the system prompt."""
+from strands import tool
+
+TEMPLATES = {
+    "A1": """Subject: Additional Information Needed - [Job Title] Position
+
+Dear [Hiring Manager],
+
+Thank you for submitting the [Job Title] position. To ensure we attract the best candidates, I need a few additional details:
+
+[LIST SPECIFIC MISSING ITEMS]
+
+Could you provide this by [DATE]? This will allow me to begin sourcing immediately.
+
+Best regards,
+Hellio HR""",
+    "A3": """Subject: [Job Title] Position Active - [X] Potential Candidates Identified
+
+Dear [Hiring Manager],
+
+The [Job Title] position is now active in our system.
+
+**Matching Candidates from Current Pool:**
+[LIST TOP 3 CANDIDATES OR "No immediate matches found"]
+
+**Next Steps:**
+- I will begin active sourcing
+- Weekly updates on new candidates
+- Strong matches shared immediately
+
+Best regards,
+Hellio HR""",
+    "B1": """Subject: CV Needed - [Position] Application
+
+Dear [Candidate Name],
+
+Thank you for your interest in the [Position] role!
+
+I noticed your CV wasn't attached. Could you please reply with your CV as a PDF or Word document?
+
+Looking forward to reviewing your background!
+
+Best regards,
+Hellio HR""",
+    "B4": """Subject: Your Application for [Position] - Next Steps
+
+Dear [Candidate Name],
+
+Thank you for applying for the [Position] role! I've reviewed your CV and I'm impressed by your [SPECIFIC STRENGTH].
+
+Your background aligns well with what we're looking for. Here's what happens next:
+
+1. Initial Review (current) - Sharing with hiring manager
+2. Phone Screen (if selected) - 30-minute conversation
+3. Technical Interview - Deeper skills assessment
+4. Final Interview - Team fit discussion
+
+Expect to hear from us within 3-5 business days.
+
+Best regards,
+Hellio HR""",
+    "B5": """Subject: Your Application for [Position] - Under Review
+
+Dear [Candidate Name],
+
+Thank you for applying for the [Position] role! Your background in [AREA] shows promise.
+
+We're reviewing all applications and will be in touch within 5-7 business days.
+
+Best regards,
+Hellio HR""",
+    "B6": """Subject: Alternative Opportunities - [Original Position]
+
+Dear [Candidate Name],
+
+Thank you for applying for the [Position] role! After reviewing your CV, I noticed your strong background in [THEIR STRENGTH].
+
+For this specific role, we're looking for [MISSING REQUIREMENT]. However, these positions might be a better fit:
+
+[LIST ALTERNATIVE POSITIONS]
+
+Would you like to be considered for any of these?
+
+Best regards,
+Hellio HR""",
+    "B7": """Subject: Thank You for Your Application - [Position]
+
+Dear [Candidate Name],
+
+Thank you for your interest in the [Position] role at Hellio.
+
+After reviewing your background, we've decided to move forward with candidates whose experience more closely aligns with [KEY REQUIREMENT].
+
+We'll keep your CV on file for future opportunities.
+
+Best regards,
+Hellio HR""",
+    "B8": """Subject: Strong Candidate for [Position] - [Candidate Name]
+
+Dear [Hiring Manager],
+
+I wanted to share an exciting candidate for the [Position]:
+
+**Candidate**: [Name]
+**Background**: [Current role, years experience, key skills]
+**Why Strong Match**: [2-3 specific alignments]
+**Profile**: [Link to Hellio system]
+
+Recommend scheduling a phone screen within the week.
+
+Best regards,
+Hellio HR""",
+}
+
+
+@tool
+def get_template(name: str) -> str:
+    """
+    Get an email template by name.
+
+    Args:
+        name: Template name (A1, A3, B1, B4, B5, B6, B7, B8)
+
+    Returns:
+        Template text with [PLACEHOLDERS] to fill in, or an error message
+    """
+    template = TEMPLATES.get(name.strip().upper())
+    if template is None:
+        return f"Unknown template '{name}'. Available: {', '.join(TEMPLATES)}"
+    return template